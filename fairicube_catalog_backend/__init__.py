@@ -1,7 +1,9 @@
 import logging
 import time
 
-from fastapi import FastAPI, Request
+from http import HTTPStatus
+
+from fastapi import FastAPI, Request, Response
 from starlette_exporter import PrometheusMiddleware, handle_metrics
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -28,10 +30,25 @@ if __name__ != "__main__":
 
 
 @app.get("/probe")
-def probe():
+def probe(response: Response):
+    # report ready only once the caches are warm, so that the first requests
+    # after a deploy or a worker restart don't pay the cold fetches
+    if not scheduler.warmer.ready:
+        response.status_code = HTTPStatus.SERVICE_UNAVAILABLE
     return {}
 
 
+@app.on_event("startup")
+def start_cache_warmer():
+    if config.CACHE_WARMER_ENABLED:
+        scheduler.warmer.start()
+
+
+@app.on_event("shutdown")
+def stop_cache_warmer():
+    scheduler.warmer.stop()
+
+
 @app.middleware("http")
 async def log_middle(request: Request, call_next):
     start_time = time.time()
@@ -52,4 +69,5 @@ async def log_middle(request: Request, call_next):
     return response
 
 
+from fairicube_catalog_backend import config, scheduler  # noqa: E402
 import fairicube_catalog_backend.views  # noqa
@@ -0,0 +1,276 @@
+import collections
+import dataclasses
+import json
+import logging
+import threading
+import time
+import typing
+
+from fairicube_catalog_backend import config
+from fairicube_catalog_backend.circuit_breaker import CircuitBreaker, UpstreamUnavailable
+from fairicube_catalog_backend.pull_request import (
+    fetch_items,
+    get_blob,
+    get_item,
+    get_item_url,
+    get_members,
+    get_published_item,
+    is_upstream_failure,
+    PullItemUrl,
+)
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+# key for caches which only ever hold a single value
+ALL = "all"
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheEntry(typing.Generic[T]):
+    value: T
+    fetched_at: float
+    expires_at: typing.Optional[float] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def stale(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class Cache(typing.Generic[T]):
+    """Thread-safe in-process cache with stale-while-revalidate semantics.
+
+    Entries older than `ttl` seconds are stale: they are still served, but are
+    reloaded in the background. `ttl=None` keeps entries fresh until they are
+    invalidated or evicted because of `max_size`. Loads go through `breaker`,
+    so a failing upstream isn't hammered while stale entries are served.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: typing.Optional[float],
+        max_size: int = 1024,
+        breaker: typing.Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.breaker = breaker
+        self._entries: "collections.OrderedDict[typing.Hashable, CacheEntry[T]]" = (
+            collections.OrderedDict()
+        )
+        self._revalidating: typing.Set[typing.Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Hashable, loader: typing.Callable[[], T]) -> T:
+        return self.get_entry(key, loader).value
+
+    def get_entry(
+        self,
+        key: typing.Hashable,
+        loader: typing.Callable[[], T],
+    ) -> CacheEntry[T]:
+        entry = self.peek(key)
+        if entry is None:
+            return self._load(key, loader)
+        if entry.stale:
+            self._revalidate(key, loader)
+        return entry
+
+    def refresh(self, key: typing.Hashable, loader: typing.Callable[[], T]) -> T:
+        return self._load(key, loader).value
+
+    def _load(self, key: typing.Hashable, loader: typing.Callable[[], T]) -> CacheEntry[T]:
+        if self.breaker is None:
+            return self.set(key, loader())
+
+        try:
+            value = self.breaker.call(loader)
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            if self.breaker.is_failure(e):
+                raise UpstreamUnavailable(self.name) from e
+            raise
+        return self.set(key, value)
+
+    def _revalidate(self, key: typing.Hashable, loader: typing.Callable[[], T]) -> None:
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run() -> None:
+            try:
+                self.refresh(key, loader)
+            except Exception:
+                logger.warning(
+                    f"Failed to revalidate {self.name} cache, serving stale data",
+                    exc_info=True,
+                )
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(
+            target=run, name=f"revalidate-{self.name}", daemon=True
+        ).start()
+
+    def peek(self, key: typing.Hashable) -> typing.Optional[CacheEntry[T]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: typing.Hashable, value: T) -> CacheEntry[T]:
+        with self._lock:
+            now = time.monotonic()
+            entry = CacheEntry(
+                value=value,
+                fetched_at=now,
+                expires_at=None if self.ttl is None else now + self.ttl,
+            )
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return entry
+
+    def keys(self) -> typing.List[typing.Hashable]:
+        with self._lock:
+            return list(self._entries)
+
+    def expire(self, key: typing.Optional[typing.Hashable] = None) -> None:
+        """Mark entries stale, they are revalidated but can still be served"""
+        with self._lock:
+            now = time.monotonic()
+            keys = list(self._entries) if key is None else [key]
+            for expired_key in keys:
+                if expired_key in self._entries:
+                    self._entries[expired_key] = dataclasses.replace(
+                        self._entries[expired_key], expires_at=now
+                    )
+
+    def invalidate(self, key: typing.Optional[typing.Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+def upstream_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=config.CIRCUIT_BREAKER_RESET_TIMEOUT,
+        is_failure=is_upstream_failure,
+    )
+
+
+# NOTE: the ttls are a fallback for when the warmer isn't running (or is
+#       behind), so they are chosen generously above the refresh intervals.
+pull_requests: Cache[list] = Cache(
+    "pull_requests",
+    ttl=2 * config.CACHE_PULL_REQUESTS_REFRESH_INTERVAL,
+    breaker=upstream_breaker("pull_requests"),
+)
+members: Cache[list] = Cache(
+    "members",
+    ttl=2 * config.CACHE_MEMBERS_REFRESH_INTERVAL,
+    breaker=upstream_breaker("members"),
+)
+# pull request number -> raw url of the item file in the pull request
+item_urls: Cache[PullItemUrl] = Cache(
+    "item_urls",
+    ttl=2 * config.CACHE_ITEMS_REFRESH_INTERVAL,
+    breaker=upstream_breaker("item_urls"),
+)
+# raw urls contain the commit sha, so their contents never change
+items: Cache[dict] = Cache(
+    "items",
+    ttl=None,
+    max_size=512,
+    breaker=upstream_breaker("items"),
+)
+# path in repo -> item on the main branch
+published_items: Cache[dict] = Cache(
+    "published_items",
+    ttl=2 * config.CACHE_ITEMS_REFRESH_INTERVAL,
+    max_size=512,
+    breaker=upstream_breaker("published_items"),
+)
+# git blob shas are content addresses as well
+blobs: Cache[typing.Any] = Cache(
+    "blobs",
+    ttl=None,
+    max_size=256,
+    breaker=upstream_breaker("blobs"),
+)
+
+
+def open_pull_requests() -> CacheEntry[list]:
+    return pull_requests.get_entry(ALL, fetch_items)
+
+
+def current_open_pull_requests() -> list:
+    """Open pull requests, always reloaded
+
+    For writes, which must not miss a pull request created moments ago, e.g.
+    by another worker, whose cache this worker doesn't know about.
+    """
+    return pull_requests.refresh(ALL, fetch_items)
+
+
+def pull_request_for_file(pulls: list, filename: str) -> typing.Optional[dict]:
+    return next((pull for pull in pulls if pull.get("filename") == filename), None)
+
+
+def organization_members() -> CacheEntry[list]:
+    return members.get_entry(ALL, get_members)
+
+
+class PullItem(typing.NamedTuple):
+    blob_sha: str
+    stac: dict
+
+
+def item(pull_number: int) -> CacheEntry[PullItem]:
+    url_entry = item_urls.get_entry(pull_number, lambda: get_item_url(pull_number))
+    url = url_entry.value.url
+    item_entry = items.get_entry(url, lambda: get_item(url))
+    # item contents never go stale, but the url pointing to them can
+    return CacheEntry(
+        value=PullItem(blob_sha=url_entry.value.blob_sha, stac=item_entry.value),
+        fetched_at=url_entry.fetched_at,
+        expires_at=url_entry.expires_at,
+    )
+
+
+def published_item(path_in_repo: str) -> CacheEntry[dict]:
+    return published_items.get_entry(path_in_repo, lambda: get_published_item(path_in_repo))
+
+
+def json_blob(sha: str) -> typing.Any:
+    # NOTE: the parsed document is shared between requests, don't modify it
+    return blobs.get(sha, lambda: json.loads(get_blob(sha)))
+
+
+def reload_pull_requests() -> None:
+    """Reload the open pull requests after a write, so that it shows up right away
+
+    If GitHub degrades, the previous ones are kept and served as stale.
+    """
+    item_urls.expire()
+    try:
+        pull_requests.refresh(ALL, fetch_items)
+    except Exception:
+        logger.warning("Failed to reload pull requests, serving stale ones", exc_info=True)
+        pull_requests.expire()
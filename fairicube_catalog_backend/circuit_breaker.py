@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    def __init__(self, name: str, message: typing.Optional[str] = None) -> None:
+        super().__init__(message or f"Upstream {name} is unavailable")
+        self.name = name
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(name, f"Circuit {name} is open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling an upstream operation after repeated failures.
+
+    After `failure_threshold` consecutive failures, calls fail fast with
+    `CircuitOpenError` for `reset_timeout` seconds. Then a single trial call is
+    let through, which either closes the circuit again or reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        is_failure: typing.Callable[[Exception], bool] = lambda e: True,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self._failures = 0
+        self._opened_at: typing.Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def call(self, fn: typing.Callable[[], T]) -> T:
+        with self._lock:
+            if self._opened_at is not None:
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0 or self._trial_running:
+                    raise CircuitOpenError(self.name, retry_after=max(remaining, 0))
+                self._trial_running = True
+
+        try:
+            result = fn()
+        except Exception as e:
+            if self.is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        else:
+            self._record_success()
+            return result
+
+    def _record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Closing circuit {self.name}")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                logger.warning(
+                    f"Opening circuit {self.name} after {self._failures} failures"
+                )
+                self._opened_at = time.monotonic()
+            self._trial_running = False
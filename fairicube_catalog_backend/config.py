@@ -1,31 +1,67 @@
-import json
-import os
-import pathlib
-
-GITHUB_TOKEN: str = os.environ["GITHUB_TOKEN"]
-GITHUB_REPO_ID: str = os.environ["GITHUB_REPO_ID"]
-GITHUB_ORGANIZATION = GITHUB_REPO_ID.split("/")[0]
-
-GITHUB_MAIN_BRANCH: str = os.environ.get("GITHUB_MAIN_BRANCH", "main")
-
-OBJECT_STORAGE_ENDPOINT_URL: str | None = os.environ.get("OBJECT_STORAGE_ENDPOINT_URL")
-OBJECT_STORAGE_ACCESS_KEY_ID: str | None = os.environ.get(
-    "OBJECT_STORAGE_ACCESS_KEY_ID"
-)
-OBJECT_STORAGE_SECRET_ACCESS_KEY: str | None = os.environ.get(
-    "OBJECT_STORAGE_SECRET_ACCESS_KEY"
-)
-OBJECT_STORAGE_BUCKET: str | None = os.environ.get("OBJECT_STORAGE_BUCKET")
-OBJECT_STORAGE_PUBLIC_URL_BASE: str | None = os.environ.get(
-    "OBJECT_STORAGE_PUBLIC_URL_BASE"
-)
-
-REMOTE_PROCESSING_BACKEND_MAPPING: dict | None = (
-    json.load(pathlib.Path(p).open())
-    if (p := os.environ.get("REMOTE_PROCESSING_BACKEND_MAPPING_FILE_PATH"))
-    else None
-)
-
-RESOURCE_CATALOG_METADATA_URL: str | None = os.environ.get(
-    "RESOURCE_CATALOG_METADATA_URL"
-)
+import functools
+import typing
+
+import pydantic
+
+
+class Settings(pydantic.BaseSettings):
+    """All settings, read from environment variables of the same name"""
+
+    GITHUB_TOKEN: str
+    GITHUB_REPO_ID: str
+    GITHUB_MAIN_BRANCH: str = "main"
+    # seconds to wait for a single response from GitHub
+    GITHUB_TIMEOUT: int = pydantic.Field(10, gt=0)
+
+    OBJECT_STORAGE_ENDPOINT_URL: typing.Optional[str] = None
+    OBJECT_STORAGE_ACCESS_KEY_ID: typing.Optional[str] = None
+    OBJECT_STORAGE_SECRET_ACCESS_KEY: typing.Optional[str] = None
+    OBJECT_STORAGE_BUCKET: typing.Optional[str] = None
+    OBJECT_STORAGE_PUBLIC_URL_BASE: typing.Optional[str] = None
+
+    # NOTE: the file is (re)loaded by `metadata.backend_index`, so changes are
+    #       picked up without restarting
+    REMOTE_PROCESSING_BACKEND_MAPPING_FILE_PATH: typing.Optional[str] = None
+
+    RESOURCE_CATALOG_METADATA_URL: typing.Optional[str] = None
+    RESOURCE_CATALOG_METADATA_TTL: float = pydantic.Field(300, gt=0)
+    RESOURCE_CATALOG_TIMEOUT: float = pydantic.Field(10, gt=0)
+
+    CACHE_WARMER_ENABLED: bool = True
+    CACHE_PULL_REQUESTS_REFRESH_INTERVAL: float = pydantic.Field(60, gt=0)
+    CACHE_MEMBERS_REFRESH_INTERVAL: float = pydantic.Field(900, gt=0)
+    CACHE_ITEMS_REFRESH_INTERVAL: float = pydantic.Field(300, gt=0)
+    CACHE_REFRESH_JITTER: float = pydantic.Field(0.1, ge=0, lt=1)
+    CACHE_WARMER_MIN_RATE_LIMIT_REMAINING: int = pydantic.Field(500, ge=0)
+
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = pydantic.Field(5, gt=0)
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = pydantic.Field(30, gt=0)
+
+    @pydantic.validator("GITHUB_REPO_ID")
+    def repo_id_has_organization(cls, value: str) -> str:
+        if len(value.split("/")) != 2:
+            raise ValueError("must be of the form <organization>/<repository>")
+        return value
+
+    @property
+    def GITHUB_ORGANIZATION(self) -> str:
+        return self.GITHUB_REPO_ID.split("/")[0]
+
+    class Config:
+        case_sensitive = True
+
+
+@functools.lru_cache(maxsize=None)
+def settings() -> Settings:
+    # NOTE: values come from the environment, which mypy doesn't know about
+    return Settings()  # type: ignore[call-arg]
+
+
+def __getattr__(name: str) -> typing.Any:
+    # settings are accessed as `config.GITHUB_TOKEN`, but are only read and
+    # validated once. that happens when the app is imported, as the caches
+    # are configured at module level.
+    try:
+        return getattr(settings(), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,152 @@
+import dataclasses
+from http import HTTPStatus
+import json
+import logging
+import os
+import threading
+import typing
+
+import requests
+
+from fairicube_catalog_backend import config
+from fairicube_catalog_backend.cache import ALL, Cache, CacheEntry, upstream_breaker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class CatalogMetadata:
+    etag: typing.Optional[str]
+    # record id -> record
+    records: typing.Dict[str, dict]
+
+
+def index_records(document: typing.Any) -> typing.Dict[str, dict]:
+    # the catalog serves its records as geojson feature collection
+    records = document.get("features", []) if isinstance(document, dict) else document
+    return {
+        record["id"]: record
+        for record in records
+        if isinstance(record, dict) and "id" in record
+    }
+
+
+def fetch_catalog_metadata(
+    previous: typing.Optional[CatalogMetadata] = None,
+) -> CatalogMetadata:
+    if not config.RESOURCE_CATALOG_METADATA_URL:
+        return CatalogMetadata(etag=None, records={})
+
+    headers = {"Accept": "application/json"}
+    if previous is not None and previous.etag:
+        headers["If-None-Match"] = previous.etag
+
+    response = requests.get(
+        config.RESOURCE_CATALOG_METADATA_URL,
+        headers=headers,
+        timeout=config.RESOURCE_CATALOG_TIMEOUT,
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED and previous is not None:
+        return previous
+    response.raise_for_status()
+
+    return CatalogMetadata(
+        etag=response.headers.get("ETag"),
+        records=index_records(response.json()),
+    )
+
+
+catalog_metadata_cache: Cache[CatalogMetadata] = Cache(
+    "catalog_metadata",
+    ttl=config.RESOURCE_CATALOG_METADATA_TTL,
+    breaker=upstream_breaker("catalog_metadata"),
+)
+
+
+def _load_catalog_metadata() -> CatalogMetadata:
+    previous = catalog_metadata_cache.peek(ALL)
+    return fetch_catalog_metadata(previous.value if previous else None)
+
+
+def catalog_metadata() -> CacheEntry[CatalogMetadata]:
+    return catalog_metadata_cache.get_entry(ALL, _load_catalog_metadata)
+
+
+def refresh_catalog_metadata() -> None:
+    catalog_metadata_cache.refresh(ALL, _load_catalog_metadata)
+
+
+def build_backend_index(mapping: typing.Any) -> typing.Dict[str, typing.Tuple[str, ...]]:
+    """Invert the backend mapping, which maps a backend to the collection ids
+    and asset keys it can process, into identifier -> backends
+    """
+    if not isinstance(mapping, dict):
+        raise ValueError("Backend mapping must be an object")
+
+    index: typing.Dict[str, typing.List[str]] = {}
+    for backend, identifiers in mapping.items():
+        if not isinstance(identifiers, list):
+            raise ValueError(f"Identifiers of backend {backend} must be a list")
+        for identifier in identifiers:
+            index.setdefault(identifier, []).append(backend)
+
+    return {identifier: tuple(sorted(backends)) for identifier, backends in index.items()}
+
+
+class BackendIndex:
+    """Index of processing backends, rebuilt whenever the mapping file changes.
+
+    A broken file is logged and the previous index is kept.
+    """
+
+    def __init__(self, path: typing.Optional[str]) -> None:
+        self.path = path
+        self._index: typing.Dict[str, typing.Tuple[str, ...]] = {}
+        self._signature: typing.Optional[typing.Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def backends_for(self, identifiers: typing.Iterable[str]) -> typing.List[str]:
+        index = self._current()
+        return sorted(
+            {backend for identifier in identifiers for backend in index.get(identifier, ())}
+        )
+
+    def _current(self) -> typing.Dict[str, typing.Tuple[str, ...]]:
+        if self.path is None:
+            return self._index
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            logger.warning(f"Can't access backend mapping {self.path}", exc_info=True)
+            return self._index
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._reload(signature)
+        return self._index
+
+    def _reload(self, signature: typing.Tuple[int, int]) -> None:
+        try:
+            with open(typing.cast(str, self.path)) as f:
+                self._index = build_backend_index(json.load(f))
+        except (OSError, ValueError):
+            logger.exception(f"Failed to load backend mapping {self.path}")
+        else:
+            logger.info(f"Loaded backend mapping {self.path}")
+        # don't retry a broken file until it changes again
+        self._signature = signature
+
+
+backend_index = BackendIndex(config.REMOTE_PROCESSING_BACKEND_MAPPING_FILE_PATH)
+
+
+def item_identifiers(item: dict) -> typing.List[str]:
+    """Identifiers under which an item's backends are listed in the mapping"""
+    identifiers = [item["collection"]] if isinstance(item.get("collection"), str) else []
+    assets = item.get("assets")
+    if isinstance(assets, dict):
+        identifiers.extend(assets.keys())
+    return identifiers
@@ -0,0 +1,54 @@
+import copy
+import typing
+
+import jsonpatch
+import jsonpointer
+
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+MERGE_PATCH_MEDIA_TYPE = "application/merge-patch+json"
+MEDIA_TYPES = (JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE)
+
+
+class PatchError(Exception):
+    pass
+
+
+class UnsupportedPatchType(Exception):
+    pass
+
+
+def apply_patch(document: dict, patch: typing.Any, media_type: str) -> dict:
+    """Apply a RFC 6902 JSON Patch or RFC 7396 merge patch without modifying `document`
+
+    The result must be an object again, as patched documents are STAC items.
+    """
+    if media_type == JSON_PATCH_MEDIA_TYPE:
+        if not isinstance(patch, list) or not all(isinstance(op, dict) for op in patch):
+            raise PatchError("JSON Patch must be a list of operation objects")
+        try:
+            result = jsonpatch.apply_patch(document, patch)
+        # NOTE: jsonpatch raises TypeError for e.g. a `from` which isn't a string
+        except (jsonpatch.JsonPatchException, jsonpointer.JsonPointerException, TypeError) as e:
+            raise PatchError(str(e)) from e
+    elif media_type == MERGE_PATCH_MEDIA_TYPE:
+        result = merge_patch(document, patch)
+    else:
+        raise UnsupportedPatchType(media_type)
+
+    if not isinstance(result, dict):
+        raise PatchError("Patched document must be an object")
+    return result
+
+
+def merge_patch(target: typing.Any, patch: typing.Any) -> typing.Any:
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+
+    # untouched values are shared with `target`, but never modified
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
@@ -1,3 +1,4 @@
+import base64
 import dataclasses
 import requests
 import re
@@ -5,7 +6,9 @@ import datetime
 from enum import Enum
 import logging
 import json
+import os
 from pathlib import PurePath
+import threading
 import urllib.parse
 import typing
 
@@ -40,11 +43,38 @@ class PullRequestState(str, Enum):
             return cls.rejected
 
 
+# NOTE: clients are created lazily per thread, so that their connections are
+#       reused, but are neither shared between threads nor inherited by forked
+#       workers (e.g. gunicorn with `preload_app`).
+_clients = threading.local()
+
+
+def _client(name: str, factory: typing.Callable[[], typing.Any]) -> typing.Any:
+    if getattr(_clients, "pid", None) != os.getpid():
+        _clients.__dict__.clear()
+        _clients.pid = os.getpid()
+    if not hasattr(_clients, name):
+        setattr(_clients, name, factory())
+    return getattr(_clients, name)
+
+
+def _github() -> github.Github:
+    return _client(
+        "github",
+        lambda: github.Github(config.GITHUB_TOKEN, timeout=config.GITHUB_TIMEOUT),
+    )
+
+
+def _session() -> requests.Session:
+    return _client("session", requests.Session)
+
+
 def _repo() -> github.Repository.Repository:
-    return github.Github(config.GITHUB_TOKEN).get_repo(config.GITHUB_REPO_ID)
+    # NOTE: fetching the repo costs a request, so it's kept like the client
+    return _client("repo", lambda: _github().get_repo(config.GITHUB_REPO_ID))
 
 def _org() -> github.Organization.Organization:
-    return github.Github(config.GITHUB_TOKEN).get_organization(config.GITHUB_ORGANIZATION)
+    return _client("org", lambda: _github().get_organization(config.GITHUB_ORGANIZATION))
 
 def _get_headers():
     return {'Accept': 'application/json',
@@ -112,9 +142,11 @@ def get_items_from_catalog(
         items_links
         ):
 
-    catalog = requests.get(f"https://raw.githubusercontent.com/{config.GITHUB_REPO_ID}/{branch}/stac_dist/{file_name}",
-                           headers=_get_headers()
-                           )
+    catalog = _session().get(f"https://raw.githubusercontent.com/{config.GITHUB_REPO_ID}/{branch}/stac_dist/{file_name}",
+                             headers=_get_headers(),
+                             timeout=config.GITHUB_TIMEOUT,
+                             )
+    catalog.raise_for_status()
     for link in catalog.json()["links"]:
         if (link["rel"] == "item" and link["href"][2:] not in branch_list):
             items_links.append({
@@ -124,15 +156,45 @@ def get_items_from_catalog(
     return items_links
 
 
-def get_item_url(body):
-    pull_id = body["item"]
-    pull = _repo().get_pull(pull_id["path"])
+def get_published_item(path_in_repo: str) -> dict:
+    return get_item(
+        f"https://raw.githubusercontent.com/{config.GITHUB_REPO_ID}/{config.GITHUB_MAIN_BRANCH}/{path_in_repo}"
+    )
+
+
+class PullItemUrl(typing.NamedTuple):
+    # the url only changes when new commits are pushed to the pull request
+    head_sha: str
+    url: str
+    # version of the item file, to be passed to PATCH as `If-Match`
+    blob_sha: str
+
+
+def get_item_url(pull_number: int) -> PullItemUrl:
+    pull = _repo().get_pull(pull_number)
 
     files = pull.get_files()
     first_item = files._fetchNextPage()
     if files.totalCount > 1:
         first_item = files.reversed._fetchNextPage()
-    return first_item[0].raw_url
+    return PullItemUrl(
+        head_sha=pull.head.sha,
+        url=first_item[0].raw_url,
+        blob_sha=first_item[0].sha,
+    )
+
+
+def _pull_filename(pull: github.PullRequest.PullRequest) -> typing.Optional[str]:
+    # pull requests created by this service name their file in the body
+    try:
+        return json.loads(pull.body)["filename"]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+# fields of the `fetch_items` entries which are for internal use, not for clients
+INTERNAL_ITEM_FIELDS = ("head_sha", "branch", "filename")
+
 
 def fetch_items():
     edit_list = []
@@ -151,7 +213,10 @@ def fetch_items():
                     "name": re.search(r"([^\/]+?)(\.[^.]*$|$)", pull.title).group(1),
                     "path":pull.number,
                     "pull":pulls[branch_name],
-                    "assignees": pulls[f"{branch_name}_assignees"]
+                    "assignees": pulls[f"{branch_name}_assignees"],
+                    "head_sha": pull.head.sha,
+                    "branch": branch_name,
+                    "filename": _pull_filename(pull),
                 })
 
     stac_items = file_href_list
@@ -171,8 +236,29 @@ def get_members():
         })
     return member_list
 
+
+def is_upstream_failure(e: Exception) -> bool:
+    """Whether `e` means that GitHub is degraded rather than the request was bad"""
+    if isinstance(e, requests.HTTPError):
+        return e.response is None or e.response.status_code >= 500
+    if isinstance(e, requests.RequestException):
+        # timeouts and connection errors
+        return True
+    if isinstance(e, github.RateLimitExceededException):
+        return True
+    if isinstance(e, github.GithubException):
+        return e.status >= 500
+    return False
+
+
+def rate_limit() -> github.Rate.Rate:
+    # NOTE: querying the rate limit doesn't count against the rate limit
+    return _github().get_rate_limit().core
+
+
 def get_item(path):
-    stac_item = requests.get(path, headers=_get_headers())
+    stac_item = _session().get(path, headers=_get_headers(), timeout=config.GITHUB_TIMEOUT)
+    stac_item.raise_for_status()
     stac_json = stac_item.json()
     return stac_json
 
@@ -197,6 +283,59 @@ def is_valid(pull: github.PullRequest.PullRequest) -> bool:
     except Exception:
         return False
 
+
+def _open_pull_for_file(
+    repo: github.Repository.Repository,
+    filename: str,
+) -> typing.Optional[github.PullRequest.PullRequest]:
+    for pull in repo.get_pulls(state="open"):
+        if is_valid(pull):
+            pull_filename = pull.get_files()[0].filename.split('stac_dist/')[1]
+            if filename == pull_filename:
+                return pull
+    return None
+
+
+class VersionConflict(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class FileVersion:
+    sha: str
+    branch: str
+    # the open pull request the file is currently being edited in, if any
+    pull_number: typing.Optional[int]
+
+    @property
+    def in_pull_request(self) -> bool:
+        return self.pull_number is not None
+
+
+def current_file_version(
+    path: str,
+    pull: typing.Optional[dict] = None,
+) -> typing.Optional[FileVersion]:
+    """Latest version of the file at `path`
+
+    That is the one on the branch of `pull`, an entry of `fetch_items`, if
+    the file is being edited in an open pull request.
+    """
+    branch = pull["branch"] if pull is not None else config.GITHUB_MAIN_BRANCH
+    sha = _previous_version_sha(_repo(), path=path, ref=branch)
+    if not sha:
+        return None
+    return FileVersion(
+        sha=sha,
+        branch=branch,
+        pull_number=pull["path"] if pull is not None else None,
+    )
+
+
+def get_blob(sha: str) -> bytes:
+    return base64.b64decode(_repo().get_git_blob(sha).content)
+
+
 def create_pull_request(
     branch_base_name: str,
     pr_title: str,
@@ -207,7 +346,14 @@ def create_pull_request(
     labels: typing.Tuple[str, ...] = (),
     assignees: typing.Optional[list[str]] =None,
     reviewers: typing.Optional[list[str]] =None,
-):
+    expected_sha: typing.Optional[str] = None,
+    pull_number: typing.Optional[int] = None,
+) -> typing.Optional[str]:
+    """Returns the blob sha of the created file, if any
+
+    Passing the already known `pull_number` of an edited file and the
+    `expected_sha` of its current version saves looking them up.
+    """
     logger.info("Creating pull request")
     logger.info(f"File to create: {file_to_create[0] if file_to_create else None}")
     logger.info(f"File to delete: {file_to_delete}")
@@ -216,34 +362,49 @@ def create_pull_request(
     assignee_list = []
     for assignee in assignees:
         if isinstance(assignee, str):
-            assignee_list.append(github.Github(config.GITHUB_TOKEN).get_user(assignee))
+            assignee_list.append(_github().get_user(assignee))
+    # NOTE: an `expected_sha` makes github reject the change if the file
+    #       changed in the meantime
     if file_is_updated == "edited":
-        pull_list = repo.get_pulls(
-            state="open"
+        pull = (
+            repo.get_pull(pull_number)
+            if pull_number is not None
+            else _open_pull_for_file(repo, json.loads(pr_body)["filename"])
         )
-
-        for pull in pull_list:
-            if is_valid(pull):
-                pull_filename = pull.get_files()[0].filename.split('stac_dist/')[1]
-                if json.loads(pr_body)["filename"] == pull_filename:
-                    branch_name = pull.head.ref
-                    sha = repo.get_contents(file_to_create[0], ref=branch_name).sha
-                    for assignee in assignee_list:
-                        pull.add_to_assignees(assignee)
-                    pull.create_review_request(reviewers)
-                    break
+        if pull is not None:
+            branch_name = pull.head.ref
+            if expected_sha is not None:
+                sha = expected_sha
+            else:
+                sha = repo.get_contents(file_to_create[0], ref=branch_name).sha
+            for assignee in assignee_list:
+                pull.add_to_assignees(assignee)
+            pull.create_review_request(reviewers)
     else:
         branch_name = _create_branch(repo, branch_base_name=branch_base_name)
-        sha =_previous_version_sha(repo, path=file_to_create[0])
+        if expected_sha is not None:
+            sha = expected_sha
+        else:
+            sha =_previous_version_sha(repo, path=file_to_create[0])
 
+    new_sha = None
     if file_to_create:
-        repo.update_file(
-            path=file_to_create[0],
-            message=f"Add {file_to_create[0]} for pull request submission",
-            content=file_to_create[1],
-            sha=sha,
-            branch=branch_name,
-        )
+        try:
+            result = repo.update_file(
+                path=file_to_create[0],
+                message=f"Add {file_to_create[0]} for pull request submission",
+                content=file_to_create[1],
+                sha=sha,
+                branch=branch_name,
+            )
+        except github.GithubException as e:
+            if e.status == 409:
+                if file_is_updated != "edited":
+                    # the branch was created just for this change
+                    repo.get_git_ref(f"heads/{branch_name}").delete()
+                raise VersionConflict(file_to_create[0]) from e
+            raise
+        new_sha = result["content"].sha
 
     if file_to_delete:
         repo.delete_file(
@@ -269,6 +430,7 @@ def create_pull_request(
 
 
     logger.info("Pull request successfully created")
+    return new_sha
 
 
 def _create_branch(
@@ -304,10 +466,11 @@ def _create_branch(
 def _previous_version_sha(
     repo: github.Repository.Repository,
     path: str,
+    ref: typing.Optional[str] = None,
 ) -> str:
     pure_path = PurePath(path)
     encoded_tree_ref = urllib.parse.urlencode(
-        {"": f"{config.GITHUB_MAIN_BRANCH}:{pure_path.parent}"}
+        {"": f"{ref or config.GITHUB_MAIN_BRANCH}:{pure_path.parent}"}
     )[1:]
     try:
         parent_tree = repo.get_git_tree(encoded_tree_ref, recursive=False)
@@ -0,0 +1,220 @@
+import dataclasses
+import datetime
+from http import HTTPStatus
+import logging
+import random
+import threading
+import time
+import typing
+
+import requests
+
+from fairicube_catalog_backend import cache, config, metadata
+from fairicube_catalog_backend.pull_request import (
+    fetch_items,
+    get_item,
+    get_item_url,
+    get_members,
+    get_published_item,
+    rate_limit,
+)
+
+logger = logging.getLogger(__name__)
+
+# upper bound for waiting on a rate limit reset, so that a bogus reset time
+# can't stop refreshing altogether
+MAX_RATE_LIMIT_BACKOFF = 15 * 60
+
+
+@dataclasses.dataclass
+class RefreshJob:
+    name: str
+    interval: float
+    refresh: typing.Callable[[], None]
+    next_run: float = 0.0
+
+
+def refresh_pull_requests() -> None:
+    cache.pull_requests.refresh(cache.ALL, fetch_items)
+
+
+def refresh_members() -> None:
+    cache.members.refresh(cache.ALL, get_members)
+
+
+def refresh_items() -> None:
+    for pull in cache.open_pull_requests().value:
+        # a single broken pull request mustn't keep the others from refreshing
+        try:
+            refresh_item(pull)
+        except Exception:
+            logger.warning(f"Failed to refresh item of PR {pull['path']}", exc_info=True)
+
+
+def refresh_item(pull: dict) -> None:
+    pull_number = pull["path"]
+    url_entry = cache.item_urls.peek(pull_number)
+    if url_entry is not None and url_entry.value.head_sha == pull["head_sha"]:
+        # resolving the url costs several requests, so it's only done
+        # for new commits. the unchanged url is just marked fresh again.
+        item_url = url_entry.value
+        cache.item_urls.set(pull_number, item_url)
+    else:
+        item_url = cache.item_urls.refresh(
+            pull_number, lambda: get_item_url(pull_number)
+        )
+    if cache.items.peek(item_url.url) is None:
+        cache.items.refresh(item_url.url, lambda: get_item(item_url.url))
+
+
+def refresh_published_items() -> None:
+    # NOTE: the set of items requested from the main branch isn't known up
+    #       front, so only those requested before are kept fresh
+    for path_in_repo in cache.published_items.keys():
+        try:
+            cache.published_items.refresh(
+                path_in_repo, lambda: get_published_item(typing.cast(str, path_in_repo))
+            )
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == HTTPStatus.NOT_FOUND:
+                # deleted from the main branch, so there's nothing to keep fresh
+                cache.published_items.invalidate(path_in_repo)
+            else:
+                logger.warning(f"Failed to refresh published item {path_in_repo}", exc_info=True)
+        except Exception:
+            logger.warning(f"Failed to refresh published item {path_in_repo}", exc_info=True)
+
+
+def jittered(interval: float, jitter: float) -> float:
+    return interval * (1 + random.uniform(-jitter, jitter))
+
+
+def rate_limit_backoff(min_remaining: int) -> float:
+    """Seconds to wait until GitHub grants enough budget for refreshing again"""
+    rate = rate_limit()
+    if rate.remaining >= min_remaining:
+        return 0.0
+
+    # NOTE: pygithub returns naive utc datetimes
+    until_reset = (rate.reset - datetime.datetime.utcnow()).total_seconds()
+    return min(max(until_reset, 0.0), MAX_RATE_LIMIT_BACKOFF)
+
+
+class CacheWarmer:
+    """Fills the caches on startup and keeps them fresh in a background thread.
+
+    Runs the jobs in order once before reporting ready, afterwards each job is
+    repeated on its own jittered interval.
+    """
+
+    def __init__(
+        self,
+        jobs: typing.List[RefreshJob],
+        jitter: float,
+        min_rate_limit_remaining: int,
+    ) -> None:
+        self.jobs = jobs
+        self.jitter = jitter
+        self.min_rate_limit_remaining = min_rate_limit_remaining
+        self._warmed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        # a worker without a running warmer serves cold, but it does serve
+        return self._thread is None or self._warmed.is_set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-warmer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = 5.0) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        start_time = time.monotonic()
+        for job in self.jobs:
+            self._run_job(job)
+        self._warmed.set()
+        logger.info(
+            f"Caches warmed duration:{(time.monotonic() - start_time) * 1000:.2f}ms"
+        )
+
+        while not self._stopped.is_set():
+            job = min(self.jobs, key=lambda j: j.next_run)
+            if self._stopped.wait(max(job.next_run - time.monotonic(), 0.0)):
+                break
+
+            try:
+                backoff = rate_limit_backoff(self.min_rate_limit_remaining)
+            except Exception:
+                logger.warning("Failed to query rate limit", exc_info=True)
+                backoff = 0.0
+            if backoff:
+                logger.warning(
+                    f"GitHub rate limit is low, postponing refresh by {backoff:.0f}s"
+                )
+                for pending_job in self.jobs:
+                    pending_job.next_run = max(
+                        pending_job.next_run, time.monotonic() + backoff
+                    )
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job: RefreshJob) -> None:
+        start_time = time.monotonic()
+        try:
+            job.refresh()
+        except Exception:
+            logger.exception(f"Failed to refresh {job.name}")
+        else:
+            logger.info(
+                f"Refreshed {job.name} "
+                f"duration:{(time.monotonic() - start_time) * 1000:.2f}ms"
+            )
+        job.next_run = time.monotonic() + jittered(job.interval, self.jitter)
+
+
+warmer = CacheWarmer(
+    jobs=[
+        # items are looked up from the pull requests, so they come last
+        RefreshJob(
+            name="pull_requests",
+            interval=config.CACHE_PULL_REQUESTS_REFRESH_INTERVAL,
+            refresh=refresh_pull_requests,
+        ),
+        RefreshJob(
+            name="members",
+            interval=config.CACHE_MEMBERS_REFRESH_INTERVAL,
+            refresh=refresh_members,
+        ),
+        RefreshJob(
+            name="items",
+            interval=config.CACHE_ITEMS_REFRESH_INTERVAL,
+            refresh=refresh_items,
+        ),
+        RefreshJob(
+            name="published_items",
+            interval=config.CACHE_ITEMS_REFRESH_INTERVAL,
+            refresh=refresh_published_items,
+        ),
+        RefreshJob(
+            name="catalog_metadata",
+            # conditional requests are cheap, so refresh before going stale
+            interval=config.RESOURCE_CATALOG_METADATA_TTL / 2,
+            refresh=metadata.refresh_catalog_metadata,
+        ),
+    ],
+    jitter=config.CACHE_REFRESH_JITTER,
+    min_rate_limit_remaining=config.CACHE_WARMER_MIN_RATE_LIMIT_REMAINING,
+)
@@ -0,0 +1,89 @@
+"""Worker startup: state shared by preloading and a cold-start profile.
+
+Run `python -m fairicube_catalog_backend.startup [--warm]` to report how long
+a fresh worker takes to import the app and, with `--warm`, to fill its caches.
+"""
+import argparse
+import gc
+import subprocess
+import sys
+import time
+import typing
+
+from fairicube_catalog_backend import config, metadata
+
+
+def build_read_only_state() -> None:
+    """Build everything which doesn't change after startup"""
+    config.settings()
+    metadata.backend_index.backends_for([])
+
+
+def prepare_for_fork() -> None:
+    """Run in the gunicorn master when preloading, before workers are forked"""
+    build_read_only_state()
+    # objects surviving until here are shared copy-on-write with the workers,
+    # keep the garbage collector from touching (and thereby copying) them
+    gc.collect()
+    gc.freeze()
+
+
+def profile_import(top: int) -> typing.Tuple[float, typing.List[typing.Tuple[int, str]]]:
+    """Import the app in a fresh interpreter, return the wall time and the slowest imports"""
+    start_time = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import fairicube_catalog_backend"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    duration = time.monotonic() - start_time
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, package = line.split("|")
+        imports.append((int(cumulative), package.strip()))
+
+    return duration, sorted(imports, reverse=True)[:top]
+
+
+def profile_warm() -> typing.List[typing.Tuple[str, float]]:
+    from fairicube_catalog_backend import scheduler
+
+    durations = []
+    for job in scheduler.warmer.jobs:
+        start_time = time.monotonic()
+        job.refresh()
+        durations.append((job.name, time.monotonic() - start_time))
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="also fill the caches, which queries GitHub",
+    )
+    args = parser.parse_args()
+
+    duration, imports = profile_import(args.top)
+    print(f"app import: {duration * 1000:.2f}ms")
+    for cumulative, package in imports:
+        print(f"  {cumulative / 1000:10.2f}ms  {package}")
+
+    start_time = time.monotonic()
+    build_read_only_state()
+    print(f"read-only state: {(time.monotonic() - start_time) * 1000:.2f}ms")
+
+    if args.warm:
+        for name, job_duration in profile_warm():
+            print(f"warm {name}: {job_duration * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import datetime
+import threading
+from unittest import mock
+
+import pytest
+import requests
+
+from fairicube_catalog_backend import cache as cache_module
+from fairicube_catalog_backend.cache import Cache
+from fairicube_catalog_backend.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    UpstreamUnavailable,
+)
+from fairicube_catalog_backend.scheduler import (
+    CacheWarmer,
+    RefreshJob,
+    jittered,
+    rate_limit_backoff,
+    refresh_items,
+    refresh_published_items,
+)
+from fairicube_catalog_backend.pull_request import PullItemUrl
+
+
+def test_cache_loads_only_once_within_ttl():
+    cache: Cache[int] = Cache("test", ttl=60)
+    loader = mock.Mock(return_value=1)
+
+    assert cache.get("a", loader) == 1
+    assert cache.get("a", loader) == 1
+    loader.assert_called_once()
+
+
+def test_cache_serves_stale_entries_while_revalidating():
+    cache: Cache[int] = Cache("test", ttl=60)
+    loader = mock.Mock(side_effect=[1, 2])
+    cache.get("a", loader)
+
+    with mock.patch("time.monotonic", return_value=10**9):
+        entry = cache.get_entry("a", loader)
+        assert entry.stale
+    assert entry.value == 1
+
+    for thread in threading.enumerate():
+        if thread.name == "revalidate-test":
+            thread.join(5)
+    assert cache.get("a", loader) == 2
+
+
+def test_cache_serves_stale_entries_if_revalidation_fails():
+    cache: Cache[int] = Cache("test", ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a", mock.Mock(side_effect=Exception)) == 1
+
+
+def test_cache_raises_without_cached_entry_if_circuit_is_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    cache: Cache[int] = Cache("test", ttl=60, breaker=breaker)
+
+    with pytest.raises(UpstreamUnavailable):
+        cache.get("a", mock.Mock(side_effect=ValueError))
+    with pytest.raises(CircuitOpenError):
+        cache.get("a", mock.Mock(return_value=1))
+
+
+def test_circuit_breaker_closes_after_successful_trial():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            breaker.call(mock.Mock(side_effect=ValueError))
+    assert breaker.is_open
+
+    assert breaker.call(lambda: 1) == 1
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_ignores_non_failures():
+    breaker = CircuitBreaker(
+        "test", failure_threshold=1, reset_timeout=60, is_failure=lambda e: False
+    )
+    with pytest.raises(ValueError):
+        breaker.call(mock.Mock(side_effect=ValueError))
+    assert not breaker.is_open
+
+
+def test_cache_evicts_least_recently_used():
+    cache: Cache[int] = Cache("test", ttl=None, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.peek("a")
+    cache.set("c", 3)
+
+    assert cache.peek("b") is None
+    assert cache.peek("a") is not None
+
+
+def test_jittered_interval_stays_within_bounds():
+    for _ in range(100):
+        assert 90 <= jittered(100, 0.1) <= 110
+
+
+@pytest.mark.parametrize(
+    "remaining,expected_min,expected_max",
+    [(5000, 0, 0), (10, 50, 60)],
+)
+def test_rate_limit_backoff(remaining, expected_min, expected_max):
+    rate = mock.Mock(
+        remaining=remaining,
+        reset=datetime.datetime.utcnow() + datetime.timedelta(seconds=60),
+    )
+    with mock.patch("fairicube_catalog_backend.scheduler.rate_limit", return_value=rate):
+        assert expected_min <= rate_limit_backoff(100) <= expected_max
+
+
+def test_warmer_is_ready_after_initial_warm_even_if_a_job_fails():
+    succeeding = mock.Mock()
+    warmer = CacheWarmer(
+        jobs=[
+            RefreshJob(name="failing", interval=60, refresh=mock.Mock(side_effect=Exception)),
+            RefreshJob(name="succeeding", interval=60, refresh=succeeding),
+        ],
+        jitter=0,
+        min_rate_limit_remaining=0,
+    )
+    warmer.start()
+    assert warmer._warmed.wait(5)
+    assert warmer.ready
+    warmer.stop()
+
+    succeeding.assert_called_once()
+
+
+@pytest.fixture()
+def clear_caches():
+    yield
+    for module_cache in (
+        cache_module.pull_requests,
+        cache_module.item_urls,
+        cache_module.items,
+        cache_module.published_items,
+    ):
+        module_cache.invalidate()
+
+
+def test_refresh_items_only_resolves_pull_requests_with_new_commits(clear_caches):
+    pulls = [{"path": 1, "head_sha": "unchanged"}, {"path": 2, "head_sha": "new"}]
+    cache_module.pull_requests.set(cache_module.ALL, pulls)
+    cache_module.item_urls.set(1, PullItemUrl(head_sha="unchanged", url="https://example.com/1", blob_sha="1"))
+    cache_module.item_urls.set(2, PullItemUrl(head_sha="old", url="https://example.com/2-old", blob_sha="2"))
+    cache_module.items.set("https://example.com/1", {})
+
+    with mock.patch(
+        "fairicube_catalog_backend.scheduler.get_item_url",
+        return_value=PullItemUrl(head_sha="new", url="https://example.com/2", blob_sha="3"),
+    ) as mock_get_item_url, mock.patch(
+        "fairicube_catalog_backend.scheduler.get_item", return_value={}
+    ) as mock_get_item:
+        refresh_items()
+
+    mock_get_item_url.assert_called_once_with(2)
+    mock_get_item.assert_called_once_with("https://example.com/2")
+
+
+def test_refresh_items_continues_after_a_failing_pull_request(clear_caches):
+    pulls = [{"path": 1, "head_sha": "a"}, {"path": 2, "head_sha": "b"}]
+    cache_module.pull_requests.set(cache_module.ALL, pulls)
+
+    with mock.patch(
+        "fairicube_catalog_backend.scheduler.get_item_url",
+        side_effect=[IndexError, PullItemUrl(head_sha="b", url="https://example.com/2", blob_sha="2")],
+    ), mock.patch(
+        "fairicube_catalog_backend.scheduler.get_item", return_value={}
+    ):
+        refresh_items()
+
+    assert cache_module.item_urls.peek(1) is None
+    assert cache_module.items.peek("https://example.com/2") is not None
+
+
+def test_current_open_pull_requests_are_reloaded_even_if_fresh(clear_caches):
+    cache_module.pull_requests.set(cache_module.ALL, [])
+
+    with mock.patch(
+        "fairicube_catalog_backend.cache.fetch_items", return_value=[{"path": 1}]
+    ) as mock_fetch_items:
+        assert cache_module.current_open_pull_requests() == [{"path": 1}]
+
+    mock_fetch_items.assert_called_once()
+
+
+def test_reload_pull_requests_after_write(clear_caches):
+    cache_module.pull_requests.set(cache_module.ALL, [])
+
+    with mock.patch(
+        "fairicube_catalog_backend.cache.fetch_items", return_value=[{"path": 1}]
+    ):
+        cache_module.reload_pull_requests()
+
+    entry = cache_module.open_pull_requests()
+    assert not entry.stale
+    assert entry.value == [{"path": 1}]
+
+
+def test_reload_pull_requests_keeps_previous_ones_if_github_fails(clear_caches):
+    cache_module.pull_requests.set(cache_module.ALL, [{"path": 1}])
+
+    with mock.patch(
+        "fairicube_catalog_backend.cache.fetch_items", side_effect=UpstreamUnavailable("test")
+    ):
+        cache_module.reload_pull_requests()
+
+    entry = cache_module.pull_requests.peek(cache_module.ALL)
+    assert entry is not None
+    assert entry.stale
+    assert entry.value == [{"path": 1}]
+
+
+def test_refresh_published_items_drops_deleted_items_and_continues(clear_caches):
+    for path_in_repo in ("deleted", "failing", "existing"):
+        cache_module.published_items.set(path_in_repo, {})
+    not_found = requests.HTTPError(response=mock.Mock(status_code=404))
+
+    with mock.patch(
+        "fairicube_catalog_backend.scheduler.get_published_item",
+        side_effect=[not_found, UpstreamUnavailable("test"), {"id": "existing"}],
+    ):
+        refresh_published_items()
+
+    assert cache_module.published_items.peek("deleted") is None
+    assert cache_module.published_items.peek("failing") is not None
+    assert cache_module.published_items.peek("existing").value == {"id": "existing"}
+
+
+def test_expired_entries_are_served_stale():
+    cache: Cache[int] = Cache("test", ttl=None)
+    cache.set("a", 1)
+    cache.expire()
+
+    entry = cache.get_entry("a", mock.Mock(side_effect=Exception))
+    assert entry.stale
+    assert entry.value == 1
+
+
+def test_cache_doesnt_wrap_errors_which_arent_upstream_failures():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60, is_failure=lambda e: False)
+    cache: Cache[int] = Cache("test", ttl=60, breaker=breaker)
+
+    with pytest.raises(ValueError):
+        cache.get("a", mock.Mock(side_effect=ValueError))
+
+
+def test_cold_load_returns_loaded_entry_even_if_evicted_concurrently():
+    cache: Cache[int] = Cache("test", ttl=60)
+
+    def load():
+        cache.invalidate()
+        return 1
+
+    assert cache.get_entry("a", load).value == 1
@@ -0,0 +1,39 @@
+import pydantic
+import pytest
+
+from fairicube_catalog_backend.config import Settings
+
+
+@pytest.fixture()
+def environment(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "")
+    monkeypatch.setenv("GITHUB_REPO_ID", "example/example")
+    return monkeypatch
+
+
+def test_settings_are_read_from_environment(environment):
+    environment.setenv("CACHE_WARMER_ENABLED", "false")
+    settings = Settings()
+
+    assert settings.GITHUB_ORGANIZATION == "example"
+    assert settings.CACHE_WARMER_ENABLED is False
+
+
+@pytest.mark.parametrize(
+    "name,value",
+    [
+        ("GITHUB_REPO_ID", "example"),
+        ("CACHE_REFRESH_JITTER", "1.5"),
+        ("GITHUB_TIMEOUT", "0"),
+    ],
+)
+def test_invalid_settings_fail(environment, name, value):
+    environment.setenv(name, value)
+    with pytest.raises(pydantic.ValidationError):
+        Settings()
+
+
+def test_missing_settings_fail(environment):
+    environment.delenv("GITHUB_TOKEN")
+    with pytest.raises(pydantic.ValidationError):
+        Settings()
@@ -0,0 +1,79 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from fairicube_catalog_backend import config
+from fairicube_catalog_backend.metadata import (
+    BackendIndex,
+    CatalogMetadata,
+    build_backend_index,
+    fetch_catalog_metadata,
+    index_records,
+    item_identifiers,
+)
+
+METADATA_URL = "https://catalog.example.com/collections/metadata/items"
+
+
+@pytest.fixture()
+def metadata_url():
+    with mock.patch.object(config, "RESOURCE_CATALOG_METADATA_URL", METADATA_URL):
+        yield METADATA_URL
+
+
+def test_index_records_indexes_feature_collections_by_id():
+    document = {"type": "FeatureCollection", "features": [{"id": "a"}, {"no_id": 1}]}
+    assert index_records(document) == {"a": {"id": "a"}}
+
+
+def test_fetch_catalog_metadata_reuses_previous_if_not_modified(requests_mock, metadata_url):
+    requests_mock.get(metadata_url, status_code=304)
+    previous = CatalogMetadata(etag='"1"', records={"a": {"id": "a"}})
+
+    assert fetch_catalog_metadata(previous) is previous
+    assert requests_mock.last_request.headers["If-None-Match"] == '"1"'
+
+
+def test_fetch_catalog_metadata_stores_etag(requests_mock, metadata_url):
+    requests_mock.get(metadata_url, json=[{"id": "a"}], headers={"ETag": '"2"'})
+
+    assert fetch_catalog_metadata() == CatalogMetadata(etag='"2"', records={"a": {"id": "a"}})
+
+
+def test_build_backend_index_inverts_mapping():
+    index = build_backend_index({"b2": ["collection", "data"], "b1": ["collection"]})
+    assert index == {"collection": ("b1", "b2"), "data": ("b2",)}
+
+
+def test_backend_index_reloads_changed_file(tmp_path):
+    mapping_file = tmp_path / "mapping.json"
+    mapping_file.write_text(json.dumps({"b1": ["collection"]}))
+    index = BackendIndex(str(mapping_file))
+    assert index.backends_for(["collection"]) == ["b1"]
+
+    mapping_file.write_text(json.dumps({"b2": ["collection"]}))
+    os.utime(mapping_file, ns=(0, 0))
+    assert index.backends_for(["collection"]) == ["b2"]
+
+
+def test_backend_index_keeps_previous_index_for_broken_file(tmp_path):
+    mapping_file = tmp_path / "mapping.json"
+    mapping_file.write_text(json.dumps({"b1": ["collection"]}))
+    index = BackendIndex(str(mapping_file))
+    index.backends_for([])
+
+    mapping_file.write_text("{")
+    os.utime(mapping_file, ns=(0, 0))
+    assert index.backends_for(["collection"]) == ["b1"]
+
+
+def test_item_identifiers_contain_collection_and_asset_keys():
+    item = {"collection": "c", "assets": {"data": {}, "thumbnail": {}}}
+    assert item_identifiers(item) == ["c", "data", "thumbnail"]
+
+
+@pytest.mark.parametrize("item", [{"assets": []}, {"collection": {"id": "c"}, "assets": None}])
+def test_item_identifiers_ignore_invalid_items(item):
+    assert item_identifiers(item) == []
@@ -0,0 +1,61 @@
+import pytest
+
+from fairicube_catalog_backend.patch import (
+    JSON_PATCH_MEDIA_TYPE,
+    MERGE_PATCH_MEDIA_TYPE,
+    PatchError,
+    UnsupportedPatchType,
+    apply_patch,
+    merge_patch,
+)
+
+
+@pytest.mark.parametrize(
+    "target,patch,expected",
+    [
+        # examples from RFC 7396, appendix A
+        ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+        ({"a": "b"}, {"b": "c"}, {"a": "b", "b": "c"}),
+        ({"a": "b"}, {"a": None}, {}),
+        ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+        (["a", "b"], ["c", "d"], ["c", "d"]),
+        ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+        ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+    ],
+)
+def test_merge_patch(target, patch, expected):
+    assert merge_patch(target, patch) == expected
+
+
+def test_patches_dont_modify_document():
+    document = {"a": {"b": 1}}
+    apply_patch(document, {"a": {"b": 2}}, MERGE_PATCH_MEDIA_TYPE)
+    apply_patch(document, [{"op": "remove", "path": "/a/b"}], JSON_PATCH_MEDIA_TYPE)
+    assert document == {"a": {"b": 1}}
+
+
+@pytest.mark.parametrize(
+    "patch",
+    [
+        [{"op": "remove", "path": "/missing"}],
+        [{"op": "test", "path": "/a", "value": 2}],
+        {"op": "remove", "path": "/a"},
+        [1],
+        [{"op": "copy", "from": 1, "path": "/b"}],
+        [{"op": "add", "path": "", "value": [1]}],
+    ],
+)
+def test_invalid_json_patch_fails(patch):
+    with pytest.raises(PatchError):
+        apply_patch({"a": 1}, patch, JSON_PATCH_MEDIA_TYPE)
+
+
+@pytest.mark.parametrize("patch", [None, [1, 2], "a"])
+def test_merge_patch_replacing_the_object_fails(patch):
+    with pytest.raises(PatchError):
+        apply_patch({"a": 1}, patch, MERGE_PATCH_MEDIA_TYPE)
+
+
+def test_unknown_media_type_fails():
+    with pytest.raises(UnsupportedPatchType):
+        apply_patch({}, {}, "application/json")
@@ -0,0 +1,34 @@
+from unittest import mock
+
+import github
+import pytest
+
+from fairicube_catalog_backend.pull_request import VersionConflict, create_pull_request
+
+
+@pytest.fixture()
+def mock_repo():
+    with mock.patch("fairicube_catalog_backend.pull_request._repo") as mocker:
+        yield mocker.return_value
+
+
+def test_conflicting_change_deletes_its_new_branch(mock_repo):
+    mock_repo.update_file.side_effect = github.GithubException(409, {}, {})
+
+    with mock.patch(
+        "fairicube_catalog_backend.pull_request._create_branch",
+        return_value="stac-dist-a",
+    ), pytest.raises(VersionConflict):
+        create_pull_request(
+            branch_base_name="stac-dist-a",
+            pr_title="Update stac_dist/a/a.json",
+            pr_body="{}",
+            file_to_create=("stac_dist/a/a.json", b"{}"),
+            assignees=[],
+            expected_sha="outdated",
+        )
+
+    assert mock_repo.update_file.mock_calls[0].kwargs["sha"] == "outdated"
+    mock_repo.get_git_ref.assert_called_once_with("heads/stac-dist-a")
+    mock_repo.get_git_ref.return_value.delete.assert_called_once()
+    mock_repo.create_pull.assert_not_called()
@@ -4,9 +4,15 @@ import json
 from unittest import mock
 
 import pytest
+import requests
 
+from fairicube_catalog_backend.cache import CacheEntry, PullItem
+from fairicube_catalog_backend.circuit_breaker import UpstreamUnavailable
+from fairicube_catalog_backend.metadata import CatalogMetadata
 from fairicube_catalog_backend.pull_request import (
     ChangeType,
+    FileVersion,
+    VersionConflict,
     PullRequestBody,
     PullRequestState,
 )
@@ -19,7 +25,7 @@ VALID_HEADERS = {
 
 @pytest.fixture()
 def mock_create_pull_request():
-    with mock.patch("open_science_catalog_backend.views.create_pull_request") as mocker:
+    with mock.patch("fairicube_catalog_backend.views.create_pull_request") as mocker:
         yield mocker
 
 
@@ -140,3 +146,211 @@ def test_pr_body_serializes_without_dynamic_attributes(
     serialized = pull_request_body.serialize()
     raw_data = json.loads(serialized)
     assert dynamic_key not in raw_data
+
+
+@pytest.fixture()
+def mock_file_version():
+    with mock.patch(
+        "fairicube_catalog_backend.views.current_file_version",
+        return_value=FileVersion(sha="abc", branch="main", pull_number=None),
+    ) as mocker, mock.patch(
+        "fairicube_catalog_backend.cache.current_open_pull_requests",
+        return_value=[],
+    ), mock.patch(
+        "fairicube_catalog_backend.cache.json_blob",
+        return_value={"id": "a", "properties": {"title": "old"}},
+    ):
+        yield mocker
+
+
+def test_patch_item_applies_json_patch(client, mock_create_pull_request, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps([{"op": "replace", "path": "/properties/title", "value": "new"}]),
+        headers={**VALID_HEADERS, "Content-Type": "application/json-patch+json"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    mock_kwargs = mock_create_pull_request.mock_calls[0].kwargs
+    assert json.loads(mock_kwargs["file_to_create"][1])["properties"]["title"] == "new"
+    assert mock_kwargs["expected_sha"] == "abc"
+
+
+def test_patch_item_applies_merge_patch(client, mock_create_pull_request, mock_file_version):
+    client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps({"properties": {"title": None}}),
+        headers={**VALID_HEADERS, "Content-Type": "application/merge-patch+json"},
+    )
+
+    file_to_create = mock_create_pull_request.mock_calls[0].kwargs["file_to_create"]
+    assert json.loads(file_to_create[1]) == {"id": "a", "properties": {}}
+
+
+def test_patch_item_with_outdated_version_fails(client, mock_create_pull_request, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps({}),
+        headers={
+            **VALID_HEADERS,
+            "Content-Type": "application/merge-patch+json",
+            "If-Match": '"outdated"',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    mock_create_pull_request.assert_not_called()
+
+
+def test_patch_item_with_unknown_content_type_fails(client, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json", json={}, headers=VALID_HEADERS
+    )
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+    mock_file_version.assert_not_called()
+
+
+def test_patch_item_with_malformed_json_fails(client, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content="{",
+        headers={**VALID_HEADERS, "Content-Type": "application/merge-patch+json"},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    mock_file_version.assert_not_called()
+
+
+def test_patch_item_with_invalid_operations_fails(client, mock_create_pull_request, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps([1]),
+        headers={**VALID_HEADERS, "Content-Type": "application/json-patch+json"},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    mock_create_pull_request.assert_not_called()
+
+
+def test_patch_item_which_isnt_an_object_afterwards_fails(client, mock_create_pull_request, mock_file_version):
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps(None),
+        headers={**VALID_HEADERS, "Content-Type": "application/merge-patch+json"},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    mock_create_pull_request.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "cause,expected_status",
+    [
+        (requests.Timeout(), HTTPStatus.GATEWAY_TIMEOUT),
+        (requests.ConnectionError(), HTTPStatus.SERVICE_UNAVAILABLE),
+    ],
+)
+def test_upstream_failures_without_cached_data_are_unavailable(client, cause, expected_status):
+    error = UpstreamUnavailable("pull_requests")
+    error.__cause__ = cause
+    with mock.patch(
+        "fairicube_catalog_backend.cache.open_pull_requests", side_effect=error
+    ):
+        response = client.get("/item-requests/items", headers=VALID_HEADERS)
+
+    assert response.status_code == expected_status
+
+
+def test_patch_item_edits_cached_open_pull_request(client, mock_create_pull_request):
+    open_pull = {"path": 7, "branch": "edit-a", "filename": "a/a.json", "head_sha": "def"}
+    with mock.patch(
+        "fairicube_catalog_backend.cache.current_open_pull_requests",
+        return_value=[open_pull],
+    ), mock.patch("fairicube_catalog_backend.pull_request._repo"), mock.patch(
+        "fairicube_catalog_backend.pull_request._previous_version_sha",
+        return_value="abc",
+    ) as mock_previous_version_sha, mock.patch(
+        "fairicube_catalog_backend.cache.json_blob", return_value={"id": "a"}
+    ):
+        client.patch(
+            "/item-requests/stac_dist/a.json",
+            content=json.dumps({"title": "new"}),
+            headers={**VALID_HEADERS, "Content-Type": "application/merge-patch+json"},
+        )
+
+    assert mock_previous_version_sha.mock_calls[0].kwargs["ref"] == "edit-a"
+    mock_kwargs = mock_create_pull_request.mock_calls[0].kwargs
+    assert mock_kwargs["pull_number"] == 7
+    assert mock_kwargs["expected_sha"] == "abc"
+    assert mock_kwargs["file_is_updated"] == "edited"
+
+
+def test_patch_item_with_concurrent_change_fails(client, mock_create_pull_request, mock_file_version):
+    mock_create_pull_request.side_effect = VersionConflict("stac_dist/a/a.json")
+    response = client.patch(
+        "/item-requests/stac_dist/a.json",
+        content=json.dumps({}),
+        headers={**VALID_HEADERS, "Content-Type": "application/merge-patch+json"},
+    )
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+
+
+def test_fetch_item_returns_version_as_etag(client):
+    with mock.patch(
+        "fairicube_catalog_backend.cache.item",
+        return_value=CacheEntry(value=PullItem(blob_sha="abc", stac={"id": "a"}), fetched_at=0),
+    ):
+        response = client.post(
+            "/item-requests/a", json={"item": {"path": 1}}, headers=VALID_HEADERS
+        )
+
+    assert response.headers["ETag"] == '"abc"'
+    assert response.json() == {"stac": {"id": "a"}}
+
+
+def test_get_all_items_hides_internal_fields(client):
+    open_pull = {
+        "name": "a",
+        "path": 7,
+        "pull": "https://example.com",
+        "assignees": [],
+        "head_sha": "def",
+        "branch": "edit-a",
+        "filename": "a/a.json",
+    }
+    with mock.patch(
+        "fairicube_catalog_backend.cache.open_pull_requests",
+        return_value=CacheEntry(value=[open_pull], fetched_at=0),
+    ), mock.patch(
+        "fairicube_catalog_backend.cache.organization_members",
+        return_value=CacheEntry(value=[], fetched_at=0),
+    ):
+        response = client.get("/item-requests/items", headers=VALID_HEADERS)
+
+    assert response.json()["items"] == [
+        {"name": "a", "path": 7, "pull": "https://example.com", "assignees": []}
+    ]
+
+
+def test_get_item_metadata_reads_items_under_review_from_their_pull_request(client):
+    open_pull = {"path": 7, "branch": "edit-a", "filename": "a/a.json", "head_sha": "def"}
+    with mock.patch(
+        "fairicube_catalog_backend.cache.open_pull_requests",
+        return_value=CacheEntry(value=[open_pull], fetched_at=0),
+    ), mock.patch(
+        "fairicube_catalog_backend.cache.item",
+        return_value=CacheEntry(
+            value=PullItem(blob_sha="abc", stac={"id": "a", "collection": "c"}),
+            fetched_at=0,
+        ),
+    ) as mock_item, mock.patch(
+        "fairicube_catalog_backend.cache.published_item"
+    ) as mock_published_item, mock.patch(
+        "fairicube_catalog_backend.metadata.catalog_metadata",
+        return_value=CacheEntry(
+            value=CatalogMetadata(etag=None, records={"a": {"id": "a"}}), fetched_at=0
+        ),
+    ):
+        response = client.get("/item-requests/stac_dist/a.json/metadata", headers=VALID_HEADERS)
+
+    mock_item.assert_called_once_with(7)
+    mock_published_item.assert_not_called()
+    assert response.json()["catalog_metadata"] == {"id": "a"}
@@ -5,25 +5,34 @@ import json
 from http import HTTPStatus
 from pathlib import PurePath
 import logging
+import math
 import typing
 from urllib.parse import urljoin
 
-from fastapi import Request, Response, Depends, HTTPException, Header, UploadFile
-from fastapi.responses import PlainTextResponse
+from fastapi import Request, Response, Depends, HTTPException, Header, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
+import requests
 from slugify import slugify
 
 
-from fairicube_catalog_backend import app
+from fairicube_catalog_backend import app, cache, metadata
+from fairicube_catalog_backend.cache import CacheEntry
+from fairicube_catalog_backend.circuit_breaker import CircuitOpenError, UpstreamUnavailable
+from fairicube_catalog_backend.patch import (
+    MEDIA_TYPES as PATCH_MEDIA_TYPES,
+    PatchError,
+    apply_patch,
+)
 from fairicube_catalog_backend.pull_request import (
     PullRequestState,
     create_pull_request,
-    fetch_items,
-    get_item,
-    get_members,
-    get_item_url,
+    current_file_version,
     PullRequestBody,
     ChangeType,
+    INTERNAL_ITEM_FIELDS,
+    VersionConflict,
 )
 from fairicube_catalog_backend import config
 
@@ -60,21 +69,52 @@ def get_data_owner_role(
         )
 
 
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    # only reached if there is no cached data to fall back to
+    if isinstance(exc, CircuitOpenError):
+        return JSONResponse(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    return JSONResponse(
+        status_code=(
+            HTTPStatus.GATEWAY_TIMEOUT
+            if isinstance(exc.__cause__, requests.Timeout)
+            else HTTPStatus.SERVICE_UNAVAILABLE
+        ),
+        content={"detail": str(exc)},
+    )
+
+
+def _set_staleness_headers(response: Response, *entries: CacheEntry) -> None:
+    stale_entries = [entry for entry in entries if entry.stale]
+    if stale_entries:
+        response.headers["Age"] = str(int(max(entry.age for entry in stale_entries)))
+        response.headers["X-Cache-Status"] = "stale"
+
+
 @app.post(
     "/item-requests/{item_name}",
     status_code=HTTPStatus.OK,
 )
 async def fetch_item(
     request: Request,
+    response: Response,
     user=Depends(get_user),
     data_owner=Depends(get_data_owner_role),
 ):
 
     request_body = await request.json()
-    stac_url = get_item_url(request_body)
+    # a cold cache blocks on GitHub, which mustn't stall the event loop
+    item = await run_in_threadpool(cache.item, request_body["item"]["path"])
+    _set_staleness_headers(response, item)
+    # lets clients PATCH this exact version with `If-Match`
+    response.headers["ETag"] = f'"{item.value.blob_sha}"'
 
     return ResponseSingleItem(
-        stac=get_item(stac_url),
+        stac=item.value.stac,
     )
 
 
@@ -103,6 +143,72 @@ async def put_item(
     return Response()
 
 
+@app.patch("/item-requests/{item_type}/{filename}")
+async def patch_item(
+    request: Request,
+    item_type: ItemType,
+    filename: str,
+    assignees: list[str] = Query(default=[]),
+    reviewers: list[str] = Query(default=[]),
+    if_match: typing.Optional[str] = Header(default=None),
+    user=Depends(get_user),
+    data_owner=Depends(get_data_owner_role),
+):
+    """Update existing repository item via a PR by applying a JSON Patch or merge patch
+
+    The patch is applied to the latest version of the item, which is the one
+    of its open PR if there is one. Pass the blob sha of the version the patch
+    was made for as `If-Match` to reject it if the item changed since.
+    """
+
+    logger.info(f"Creating PR to patch item {filename}")
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in PATCH_MEDIA_TYPES:
+        raise HTTPException(status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+    try:
+        patch = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid JSON")
+
+    repo_filename = f"{os.path.splitext(filename)[0]}/{filename}"
+    version = current_file_version(
+        _path_in_repo(item_type, repo_filename),
+        cache.pull_request_for_file(cache.current_open_pull_requests(), repo_filename),
+    )
+    if version is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+    if if_match is not None and if_match.strip('"') != version.sha:
+        raise HTTPException(status_code=HTTPStatus.PRECONDITION_FAILED)
+
+    try:
+        patched = apply_patch(cache.json_blob(version.sha), patch, media_type)
+    except PatchError as e:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e))
+
+    try:
+        new_sha = _create_file_change_pr(
+            item_type=item_type,
+            filename=repo_filename,
+            contents={
+                "stac": patched,
+                "assignees": assignees,
+                "reviewers": reviewers,
+                "state": "edited" if version.in_pull_request else None,
+            },
+            change_type=ChangeType.update,
+            user=user,
+            data_owner=data_owner,
+            expected_sha=version.sha,
+            pull_number=version.pull_number,
+        )
+    except VersionConflict:
+        raise HTTPException(status_code=HTTPStatus.PRECONDITION_FAILED)
+
+    # the client already knows the result, so only the new version is returned
+    return Response(headers={"ETag": f'"{new_sha}"'} if new_sha else None)
+
+
 def _create_file_change_pr(
     item_type: ItemType,
     filename: str,
@@ -110,7 +216,9 @@ def _create_file_change_pr(
     user: str,
     data_owner: bool,
     contents: typing.Any = None,
-) -> None:
+    expected_sha: typing.Optional[str] = None,
+    pull_number: typing.Optional[int] = None,
+) -> typing.Optional[str]:
     pr_body = PullRequestBody(
         item_type=item_type.value,
         filename=filename,
@@ -139,7 +247,7 @@ def _create_file_change_pr(
         file_to_create = None
         file_to_delete = path_in_repo
 
-    create_pull_request(
+    new_sha = create_pull_request(
         branch_base_name=slugify(path_in_repo)[:30],
         pr_title=f"{change_type} {path_in_repo}",
         pr_body=pr_body.serialize(),
@@ -149,7 +257,11 @@ def _create_file_change_pr(
         labels=("FairicubeOwner",) if data_owner else (),
         assignees=assignees,
         reviewers=reviewers,
+        expected_sha=expected_sha,
+        pull_number=pull_number,
     )
+    cache.reload_pull_requests()
+    return new_sha
 
 
 class ResponseItem(BaseModel):
@@ -164,6 +276,13 @@ class ResponseItem(BaseModel):
 class ResponseSingleItem(BaseModel):
     stac: object
 
+
+class ItemMetadataResponse(BaseModel):
+    id: str
+    catalog_metadata: typing.Optional[dict]
+    processing_backends: list[str]
+
+
 class PullRequestLink(BaseModel):
     url:str
 
@@ -173,11 +292,65 @@ class ItemsResponse(BaseModel):
 
 
 @app.get("/item-requests/items", response_model=ItemsResponse)
-async def get_all_items(user=Depends(get_user)):
+def get_all_items(response: Response, user=Depends(get_user)):
     """Get list of IDs of items for a certain user/workspace."""
+    items = cache.open_pull_requests()
+    members = cache.organization_members()
+    _set_staleness_headers(response, items, members)
+
+    public_items: list[object] = [
+        {key: value for key, value in item.items() if key not in INTERNAL_ITEM_FIELDS}
+        for item in items.value
+    ]
+
     return ItemsResponse(
-        items=fetch_items(),
-        members=get_members()
+        items=public_items,
+        members=members.value,
+    )
+
+
+@app.get(
+    "/item-requests/{item_type}/{filename}/metadata",
+    response_model=ItemMetadataResponse,
+)
+def get_item_metadata(
+    response: Response,
+    item_type: ItemType,
+    filename: str,
+    user=Depends(get_user),
+):
+    """Get resource catalog metadata and processing backends of an item
+
+    Items under review are read from their open PR, others from the main branch.
+    """
+    item_id = os.path.splitext(filename)[0]
+    repo_filename = f"{item_id}/{filename}"
+    pulls = cache.open_pull_requests()
+    pull = cache.pull_request_for_file(pulls.value, repo_filename)
+    try:
+        if pull is not None:
+            pull_item = cache.item(pull["path"])
+            item = CacheEntry(
+                value=pull_item.value.stac,
+                fetched_at=pull_item.fetched_at,
+                expires_at=pull_item.expires_at,
+            )
+        else:
+            item = cache.published_item(_path_in_repo(item_type, repo_filename))
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == HTTPStatus.NOT_FOUND:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        raise
+    catalog = metadata.catalog_metadata()
+    _set_staleness_headers(response, pulls, item, catalog)
+
+    item_id = item.value.get("id", item_id)
+    return ItemMetadataResponse(
+        id=item_id,
+        catalog_metadata=catalog.value.records.get(item_id),
+        processing_backends=metadata.backend_index.backends_for(
+            metadata.item_identifiers(item.value)
+        ),
     )
 
 
@@ -1,5 +1,14 @@
 from prometheus_client import multiprocess
 
 
+def when_ready(server):
+    if server.cfg.preload_app:
+        # the app was imported in the master, so build its shared state here
+        # before workers are forked from it
+        from fairicube_catalog_backend.startup import prepare_for_fork
+
+        prepare_for_fork()
+
+
 def child_exit(server, worker):
     multiprocess.mark_process_dead(worker.pid)